@@ -3,6 +3,10 @@
 from typing import Any, Dict, Iterable, List, Optional
 
 
+# Tablica translacji zamienia znaki nowej linii jednym przebiegiem w C
+_WS_TABLE = str.maketrans({'\r': ' ', '\n': ' '})
+
+
 def build_correction_prompt(
     records: Iterable[Dict[str, Any]],
     user_rules: Optional[str] = None,
@@ -57,7 +61,7 @@ def build_correction_prompt(
         if remote_id_value in (None, ''):
             remote_id_value = '?'
 
-        text_value = (record.get('text_original') or '').replace('\r', ' ').replace('\n', ' ').strip()
+        text_value = (record.get('text_original') or '').translate(_WS_TABLE).strip()
         lines.append(f"{remote_id_value}. {text_value}")
 
     lines.extend(
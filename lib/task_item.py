@@ -1,11 +1,37 @@
 import ast
 import hashlib
 import json
+import os
+import queue
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from rapidfuzz import fuzz
 
+try:  # pragma: no cover - orjson to opcjonalne przyspieszenie parsowania
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:  # pragma: no cover - opcjonalne szybkie algorytmy do detekcji zmian
+    import xxhash
+except ImportError:  # pragma: no cover
+    xxhash = None
+
+try:  # pragma: no cover - opcjonalne szybkie algorytmy do detekcji zmian
+    import blake3
+except ImportError:  # pragma: no cover
+    blake3 = None
+
+
+# Nazwy algorytmów xxhash akceptowane w ``hash_method`` zadania
+_XXHASH_METHODS = {'xxh32', 'xxh64', 'xxh3_64', 'xxh3_128'}
+
+
+# Dopasowuje cały literał w cudzysłowach z uwzględnieniem znaków ucieczki (pętla w C)
+_QUOTED_RE = re.compile(r"""(?s)(?:"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')""")
 
 def sanitize_identifier(name: str) -> str:
     """Waliduje nazwę identyfikatora SQL.
@@ -20,16 +46,18 @@ def sanitize_identifier(name: str) -> str:
         ValueError: Gdy identyfikator zawiera niedozwolone znaki.
     """
 
-    if not re.match(r"^[A-Za-z0-9_]+$", name):
+    # Sprawdzenie metodami str wykonywane w C zamiast maszyny regex;
+    # isascii() odcina alfanumeryki spoza ASCII, które przepuściłby sam isalnum()
+    if not (name and name.isascii() and name.replace('_', '0').isalnum()):
         raise ValueError(f"Nieprawidłowa nazwa identyfikatora: {name}")
     return name
 
 
-def calculate_hash(text: str, method: str) -> str:
+def calculate_hash(text: str | bytes, method: str) -> str:
     """Oblicza hash tekstu wskazanym algorytmem.
 
     Args:
-        text (str): Tekst, który należy zhashować.
+        text (str | bytes): Tekst lub gotowe bajty UTF-8 do zhashowania.
         method (str): Nazwa algorytmu dostępnego w ``hashlib``.
 
     Returns:
@@ -39,12 +67,56 @@ def calculate_hash(text: str, method: str) -> str:
         ValueError: Gdy przekazano nieobsługiwany algorytm hashujący.
     """
 
+    # Wspólna ścieżka z make_hasher — bezpośredni konstruktor zamiast hashlib.new
+    hasher_ctor = make_hasher(method)
+    # Gotowe bajty nie wymagają ponownego kodowania
+    data = text if isinstance(text, bytes) else (text or '').encode('utf-8')
+    return hasher_ctor(data).hexdigest()
+
+
+def make_hasher(method: str):
+    """Rozwiązuje konstruktor hasha jednorazowo dla całego zadania.
+
+    Args:
+        method (str): Nazwa algorytmu dostępnego w ``hashlib``.
+
+    Returns:
+        Callable: Konstruktor przyjmujący bajty i zwracający obiekt hasha.
+
+    Raises:
+        ValueError: Gdy przekazano nieobsługiwany algorytm hashujący.
+    """
+
+    method_name = method.lower()
+
+    # Algorytmy niekryptograficzne — original_hash służy tylko do detekcji zmian,
+    # więc zadanie może wskazać dużo szybszy xxhash lub BLAKE3 zamiast SHA-256
+    if method_name in _XXHASH_METHODS:
+        if xxhash is None:
+            raise ValueError(
+                f"Algorytm hashujący {method} wymaga zainstalowanego pakietu xxhash"
+            )
+        return getattr(xxhash, method_name)
+    if method_name == 'blake3':
+        if blake3 is None:
+            raise ValueError(
+                f"Algorytm hashujący {method} wymaga zainstalowanego pakietu blake3"
+            )
+        return blake3.blake3
+
+    # Bezpośredni konstruktor (np. hashlib.sha256) omija słownikowy dispatch
+    # hashlib.new; lista algorithms_guaranteed odcina inne atrybuty modułu
+    # (np. 'new'), które inaczej ominęłyby walidację i psuły kontrakt ValueError
+    if method_name in hashlib.algorithms_guaranteed:
+        ctor = getattr(hashlib, method_name, None)
+        if ctor is not None:
+            return ctor
+
     try:
-        hasher = hashlib.new(method.lower())
+        hashlib.new(method_name)
     except ValueError as error:  # noqa: B904
         raise ValueError(f"Nieobsługiwany algorytm hashujący: {method}") from error
-    hasher.update((text or '').encode('utf-8'))
-    return hasher.hexdigest()
+    return lambda data=b'': hashlib.new(method_name, data)
 
 
 def calculate_similarity_score(original_text: Optional[str], corrected_text: Optional[str]) -> float:
@@ -62,26 +134,30 @@ def calculate_similarity_score(original_text: Optional[str], corrected_text: Opt
     original_value = original_text or ''
     corrected_value = corrected_text or ''
 
+    # Identyczne teksty to najczęstszy przypadek — porównanie w C jest tańsze niż RapidFuzz
+    if original_value == corrected_value:
+        return 100.0
+    if not original_value or not corrected_value:
+        return 0.0
+
     # RapidFuzz zwraca wynik w skali 0-100, zaokrąglamy do dwóch miejsc po przecinku
-    similarity = float(fuzz.ratio(original_value, corrected_value))
+    similarity = float(fuzz.ratio(original_value, corrected_value, score_cutoff=0))
     return round(similarity, 2)
 
 
-def rows_to_dicts(cursor, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
-    """Konwertuje wynik zapytania na listę słowników.
+def column_indices(cursor, names: Sequence[str]) -> Tuple[int, ...]:
+    """Zwraca pozycje wskazanych kolumn w opisie kursora.
 
     Args:
-        cursor: Oryginalny kursor użyty do pobrania danych.
-        rows (Sequence[Sequence[Any]]): Dane zwrócone przez bazę.
+        cursor: Kursor po wykonanym zapytaniu SELECT.
+        names (Sequence[str]): Nazwy lub aliasy kolumn do zlokalizowania.
 
     Returns:
-        list[dict[str, Any]]: Lista słowników z kluczami jak aliasy kolumn.
+        tuple[int, ...]: Indeksy kolumn w kolejności podanych nazw.
     """
 
-    if not rows:
-        return []
     columns = [desc[0] for desc in cursor.description]
-    return [dict(zip(columns, row)) for row in rows]
+    return tuple(columns.index(name) for name in names)
 
 
 def extract_single_value(row: Any, key: str) -> Any:
@@ -106,6 +182,154 @@ def extract_single_value(row: Any, key: str) -> Any:
     return None
 
 
+# Limit wierszy w jednym INSERT, aby nie przekroczyć max_allowed_packet
+_INSERT_CHUNK_ROWS = 1000
+
+# Górny limit wpisów pamięci podręcznej hashy (chroni przed unikalnymi payloadami)
+_HASH_CACHE_MAX_ENTRIES = 100_000
+
+# Pula wątków do haszowania partii — OpenSSL zwalnia GIL, więc wątki skalują się na rdzenie
+_HASH_POOL = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+
+# Poniżej tej liczby tekstów narzut puli przewyższa zysk z równoległości
+_HASH_POOL_MIN_BATCH = 16
+
+# Głębokość kolejki potoku pobierania — producent może wyprzedzać konsumenta
+# o kilka partii, a ograniczenie pilnuje zużycia pamięci (backpressure)
+_PREFETCH_QUEUE_DEPTH = 4
+
+# Stałe zapytania budowane raz przy imporcie — unikamy konkatenacji per wywołanie
+# i pozwalamy sterownikowi trafiać w cache przygotowanych zapytań
+_FETCH_PENDING_SQL = (
+    "SELECT id_task_item, remote_id, text_original "
+    "FROM task_item "
+    "WHERE id_task = %s AND status = 'pending' "
+    "ORDER BY id_task_item ASC LIMIT %s"
+)
+
+_APPEND_ERROR_SQL = (
+    "UPDATE task SET error_log = CASE "
+    "WHEN error_log IS NULL OR error_log = '' THEN %s "
+    "ELSE CONCAT(error_log, '\n', %s) END WHERE id_task = %s"
+)
+
+_APPEND_DESCRIPTION_SQL = (
+    "UPDATE task SET description = CASE "
+    "WHEN description IS NULL OR description = '' THEN %s "
+    "ELSE CONCAT(description, '\n', %s) END WHERE id_task = %s"
+)
+
+# Jedyna per-partia aktualizacja task w pętli pobierania — liczniki plus marker
+_FETCH_TASK_PROGRESS_SQL = (
+    "UPDATE task SET records_fetched = records_fetched + %s, marker_id = %s "
+    "WHERE id_task = %s"
+)
+
+# Aktualizacja liczników resynchronizacji; opis dopisujemy zbiorczo na końcu cyklu
+_RESYNC_TASK_PROGRESS_SQL = (
+    "UPDATE task SET records_updated = records_updated + %s, marker_id = %s "
+    "WHERE id_task = %s"
+)
+
+# Zbiorcze dopisanie wielu komunikatów do opisu jednym zapytaniem
+_FLUSH_DESCRIPTION_SQL = (
+    "UPDATE task SET description = CONCAT_WS('\n', NULLIF(description, ''), %s) "
+    "WHERE id_task = %s"
+)
+
+_UPDATE_STAGE_SQL = (
+    "UPDATE task SET marker_max_id = %s, sync_stage = %s WHERE id_task = %s"
+)
+
+_UPDATE_STAGE_WITH_TOTAL_SQL = (
+    "UPDATE task SET marker_max_id = %s, sync_stage = %s, records_total = %s "
+    "WHERE id_task = %s"
+)
+
+# Dwa warianty aktualizacji task_item zależne od dostępnego identyfikatora
+_UPDATE_TASK_ITEM_SQL = {
+    identifier_column: (
+        "UPDATE task_item SET text_corrected = %s, status = %s, "
+        "similarity_score = %s, processed_at = NOW(), tokens_input = %s, tokens_output = %s, "
+        "ai_model = %s, finish_reason = %s WHERE id_task = %s AND "
+        f"{identifier_column} = %s"
+    )
+    for identifier_column in ('remote_id', 'id_task_item')
+}
+
+
+def _build_bulk_insert_sql(row_count: int) -> str:
+    """Buduje wielowierszowy INSERT dla wskazanej liczby rekordów.
+
+    Args:
+        row_count (int): Liczba wierszy w klauzuli VALUES.
+
+    Returns:
+        str: Gotowy tekst zapytania INSERT ... ON DUPLICATE KEY UPDATE.
+    """
+
+    values_clause = ', '.join(["(%s, %s, %s, %s, 'pending', NOW())"] * row_count)
+    return (
+        "INSERT INTO task_item (id_task, remote_id, text_original, original_hash, status, fetched_at) "
+        f"VALUES {values_clause} "
+        "ON DUPLICATE KEY UPDATE text_original = VALUES(text_original), "
+        "original_hash = VALUES(original_hash), fetched_at = VALUES(fetched_at)"
+    )
+
+
+# Pełne partie to dominujący przypadek — ich SQL budujemy raz przy imporcie
+_INSERT_FULL_CHUNK_SQL = _build_bulk_insert_sql(_INSERT_CHUNK_ROWS)
+
+
+def insert_task_items_bulk(
+    cursor,
+    values_to_insert: Sequence[Tuple[Any, ...]],
+    full_chunk_cursor=None,
+) -> None:
+    """Wstawia rekordy ``task_item`` wielowierszowym INSERT-em w partiach.
+
+    Args:
+        cursor: Kursor połączenia z bazą lokalną.
+        values_to_insert (Sequence[tuple[Any, ...]]): Krotki
+            ``(id_task, remote_id, text_original, original_hash)`` do zapisania.
+        full_chunk_cursor: Opcjonalny kursor prepared dedykowany pełnym partiom —
+            ich stały tekst SQL jest wtedy przygotowywany na serwerze tylko raz.
+    """
+
+    for start in range(0, len(values_to_insert), _INSERT_CHUNK_ROWS):
+        chunk = values_to_insert[start:start + _INSERT_CHUNK_ROWS]
+        # Jedno zapytanie z wieloma wierszami zamiast osobnego INSERT-a per rekord;
+        # pełne partie korzystają z gotowego tekstu SQL zbudowanego przy imporcie
+        if len(chunk) == _INSERT_CHUNK_ROWS:
+            insert_sql = _INSERT_FULL_CHUNK_SQL
+            target_cursor = full_chunk_cursor if full_chunk_cursor is not None else cursor
+        else:
+            insert_sql = _build_bulk_insert_sql(len(chunk))
+            target_cursor = cursor
+        params = [value for row in chunk for value in row]
+        target_cursor.execute(insert_sql, params)
+
+
+def load_resync_ids(cursor, remote_ids: Sequence[int]) -> None:
+    """Ładuje identyfikatory partii do tabeli tymczasowej ``_resync_ids``.
+
+    Args:
+        cursor: Kursor połączenia z bazą lokalną.
+        remote_ids (Sequence[int]): Identyfikatory zdalne bieżącej partii.
+    """
+
+    # DELETE zamiast TRUNCATE — nie wymusza niejawnego COMMIT w MySQL
+    cursor.execute("DELETE FROM _resync_ids")
+    for start in range(0, len(remote_ids), _INSERT_CHUNK_ROWS):
+        chunk = remote_ids[start:start + _INSERT_CHUNK_ROWS]
+        # Jeden wielowierszowy INSERT zamiast rundy sieciowej per identyfikator
+        placeholders = ','.join(['(%s)'] * len(chunk))
+        cursor.execute(
+            f"INSERT INTO _resync_ids (remote_id) VALUES {placeholders}",
+            list(chunk),
+        )
+
+
 def append_task_error(cursor, id_task: int, message: str) -> None:
     """Dopisuje komunikat błędu do kolumny ``error_log``.
 
@@ -115,53 +339,29 @@ def append_task_error(cursor, id_task: int, message: str) -> None:
         message (str): Treść komunikatu błędu.
     """
 
-    sql = (
-        "UPDATE task SET error_log = CASE "
-        "WHEN error_log IS NULL OR error_log = '' THEN %s "
-        "ELSE CONCAT(error_log, '\n', %s) END WHERE id_task = %s"
-    )
-    cursor.execute(sql, (message, message, id_task))
+    cursor.execute(_APPEND_ERROR_SQL, (message, message, id_task))
 
 
 def fetch_pending_task_items(
     cursor,
     id_task: int,
-    chunk_size: int = 10,
     max_items: int = 20,
 ) -> List[Dict[str, Any]]:
-    """Pobiera oczekujące rekordy ``task_item`` w niewielkich porcjach.
+    """Pobiera oczekujące rekordy ``task_item`` jednym ograniczonym zapytaniem.
 
     Args:
         cursor: Kursor połączenia z bazą lokalną.
         id_task (int): Identyfikator zadania, dla którego wyszukujemy rekordy.
-        chunk_size (int): Rozmiar pojedynczej partii zapytań do bazy.
         max_items (int): Maksymalna liczba rekordów zwracana przez funkcję.
 
     Returns:
         list[dict[str, Any]]: Lista rekordów zawierających podstawowe dane tekstowe.
     """
 
-    items: List[Dict[str, Any]] = []
-    last_id = 0
-
-    # Pętla pobiera dane partiami, aby ograniczyć liczbę jednoczesnych rekordów w pamięci
-    while len(items) < max_items:
-        sql = (
-            "SELECT id_task_item, remote_id, text_original "
-            "FROM task_item "
-            "WHERE id_task = %s AND status = 'pending' AND id_task_item > %s "
-            "ORDER BY id_task_item ASC LIMIT %s"
-        )
-        cursor.execute(sql, (id_task, last_id, chunk_size))
-        batch = cursor.fetchall()
-        if not batch:
-            break
-        items.extend(batch)
-        last_id = batch[-1]['id_task_item']
-        if len(batch) < chunk_size:
-            break
-
-    return items[:max_items]
+    # LIMIT ogranicza wynik po stronie serwera, a fetchall opróżnia kursor do końca —
+    # współdzielony kursor musi być pusty przed kolejnym zapytaniem (Unread result)
+    cursor.execute(_FETCH_PENDING_SQL, (id_task, max_items))
+    return cursor.fetchall()
 
 
 def build_original_text_mappings(
@@ -350,29 +550,15 @@ def _extract_json_text(response_text: str) -> str:
     if not remainder:
         return stripped
 
-    quote = remainder[0]
-    if quote not in {'"', '\''}:
+    if remainder[0] not in {'"', '\''}:
         return stripped
 
-    # Szukamy końcowego cudzysłowu z uwzględnieniem znaków ucieczki
-    escape = False
-    closing_index = None
-    for idx in range(1, len(remainder)):
-        char_value = remainder[idx]
-        if escape:
-            escape = False
-            continue
-        if char_value == "\\":
-            escape = True
-            continue
-        if char_value == quote:
-            closing_index = idx
-            break
-
-    if closing_index is None:
+    # Końcowy cudzysłów wyszukuje skompilowany wzorzec zamiast pętli po znakach
+    match = _QUOTED_RE.match(remainder)
+    if match is None:
         return stripped
 
-    quoted_section = remainder[: closing_index + 1]
+    quoted_section = match.group(0)
     try:
         # literal_eval poprawnie zinterpretuje sekwencje ucieczki
         return ast.literal_eval(quoted_section)
@@ -395,9 +581,13 @@ def parse_json_response(response_text: str) -> List[Dict[str, Any]]:
 
     json_text = _extract_json_text(response_text)
 
+    # orjson parsuje w C (z walidacją UTF-8 SIMD); stdlib json pozostaje fallbackiem
     try:
-        parsed = json.loads(json_text)
-    except json.JSONDecodeError as error:  # noqa: B904
+        if orjson is not None:
+            parsed = orjson.loads(json_text)
+        else:
+            parsed = json.loads(json_text)
+    except ValueError as error:  # noqa: B904 - obejmuje też orjson.JSONDecodeError
         raise ValueError('Odpowiedź modelu AI nie jest poprawnym JSON-em.') from error
 
     if isinstance(parsed, dict):
@@ -409,13 +599,15 @@ def parse_json_response(response_text: str) -> List[Dict[str, Any]]:
     if not isinstance(parsed, list):
         raise ValueError('Odpowiedź modelu AI powinna być listą obiektów JSON.')
 
-    normalised: List[Dict[str, Any]] = []
-    for idx, item in enumerate(parsed, start=1):
-        if not isinstance(item, dict):
-            raise ValueError(f'Element #{idx} w odpowiedzi nie jest obiektem JSON.')
-        normalised.append(item)
+    # Wyszukanie pierwszego błędnego elementu bez przepisywania całej listy
+    bad_index = next(
+        (idx for idx, item in enumerate(parsed, start=1) if not isinstance(item, dict)),
+        None,
+    )
+    if bad_index is not None:
+        raise ValueError(f'Element #{bad_index} w odpowiedzi nie jest obiektem JSON.')
 
-    return normalised
+    return parsed
 
 
 def update_task_items_from_table(
@@ -457,6 +649,12 @@ def update_task_items_from_table(
     tokens_input_per_item = tokens_input_value // item_count if item_count else 0
     tokens_output_per_item = tokens_output_value // item_count if item_count else 0
 
+    # Parametry zbieramy w kubełkach per kolumna identyfikatora i wysyłamy jednym executemany
+    update_params: Dict[str, List[Tuple[Any, ...]]] = {
+        'remote_id': [],
+        'id_task_item': [],
+    }
+
     for entry in records:
         identifier_value = entry.get('remote_id')
         identifier_column = 'remote_id'
@@ -474,7 +672,11 @@ def update_task_items_from_table(
         original_text = entry.get('text_original') or ''
         corrected_text = str(text_corrected)
 
-        similarity_score = calculate_similarity_score(original_text, corrected_text)
+        # Identyczna korekta (częsta przy zachowawczych modelach) nie wymaga RapidFuzz
+        if corrected_text == original_text:
+            similarity_score = 100.0
+        else:
+            similarity_score = calculate_similarity_score(original_text, corrected_text)
        
         #print(f"\033[90m [{identifier_value}] {original_text} -> {corrected_text} = {similarity_score}\033[0m")
         if similarity_score >= 95:
@@ -492,13 +694,7 @@ def update_task_items_from_table(
 
         status_value = 'unchanged' if corrected_text == original_text else 'changed'
 
-        cursor.execute(
-            (
-                "UPDATE task_item SET text_corrected = %s, status = %s, "
-                "similarity_score = %s, processed_at = NOW(), tokens_input = %s, tokens_output = %s, "
-                "ai_model = %s, finish_reason = %s WHERE id_task = %s AND "
-                f"{identifier_column} = %s"
-            ),
+        update_params[identifier_column].append(
             (
                 corrected_text,
                 status_value,
@@ -509,11 +705,16 @@ def update_task_items_from_table(
                 finish_reason_value,
                 id_task,
                 identifier_value,
-            ),
+            )
         )
 
-        if cursor.rowcount:
-            updated += 1
+    # Jedno zbiorcze zapytanie per wariant identyfikatora zamiast rundki per rekord
+    for identifier_column, params_list in update_params.items():
+        if not params_list:
+            continue
+        cursor.executemany(_UPDATE_TASK_ITEM_SQL[identifier_column], params_list)
+        # mysql-connector agreguje rowcount dla executemany
+        updated += max(cursor.rowcount or 0, 0)
 
     return updated
 
@@ -527,12 +728,22 @@ def append_task_description(cursor, id_task: int, message: str) -> None:
         message (str): Treść dopisywana do opisu zadania.
     """
 
-    sql = (
-        "UPDATE task SET description = CASE "
-        "WHEN description IS NULL OR description = '' THEN %s "
-        "ELSE CONCAT(description, '\n', %s) END WHERE id_task = %s"
-    )
-    cursor.execute(sql, (message, message, id_task))
+    cursor.execute(_APPEND_DESCRIPTION_SQL, (message, message, id_task))
+
+
+def flush_task_descriptions(cursor, id_task: int, messages: List[str]) -> None:
+    """Dopisuje zbuforowane komunikaty do kolumny ``description`` jednym zapytaniem.
+
+    Args:
+        cursor: Kursor połączenia z bazą lokalną.
+        id_task (int): Identyfikator zadania.
+        messages (list[str]): Bufor komunikatów; po zapisie zostaje wyczyszczony.
+    """
+
+    if not messages:
+        return
+    cursor.execute(_FLUSH_DESCRIPTION_SQL, ('\n'.join(messages), id_task))
+    messages.clear()
 
 
 def update_task_stage_and_markers(
@@ -552,17 +763,13 @@ def update_task_stage_and_markers(
         records_total (int | None): Liczba rekordów do ustawienia w ``records_total``.
     """
 
-    sql = (
-        "UPDATE task SET marker_max_id = %s, sync_stage = %s"
-        "{extra} WHERE id_task = %s"
-    )
-    extra = ''
-    params: List[Any] = [marker_max_id, stage]
     if records_total is not None:
-        extra = ', records_total = %s'
-        params.append(records_total)
-    params.append(id_task)
-    cursor.execute(sql.format(extra=extra), tuple(params))
+        cursor.execute(
+            _UPDATE_STAGE_WITH_TOTAL_SQL,
+            (marker_max_id, stage, records_total, id_task),
+        )
+    else:
+        cursor.execute(_UPDATE_STAGE_SQL, (marker_max_id, stage, id_task))
 
 
 def build_fetch_query(
@@ -591,27 +798,64 @@ def build_fetch_query(
     id_column = sanitize_identifier(id_column)
     text_column = sanitize_identifier(text_column)
 
+    # Rozmiar partii przekazujemy parametrem — tekst SQL jest stały dla całego
+    # zadania, więc serwer i sterownik mogą użyć raz sparsowanego zapytania
+    # COALESCE spycha obsługę NULL-i na serwer — Python nie mapuje None per wiersz
     if db_type == 'mssql':
         query = (
-            f"SELECT TOP {batch_size} {id_column} AS remote_id, {text_column} AS text_value "
-            f"FROM {table} WHERE {id_column} > ? ORDER BY {id_column} ASC"
+            f"SELECT {id_column} AS remote_id, COALESCE({text_column}, '') AS text_value "
+            f"FROM {table} WHERE {id_column} > ? ORDER BY {id_column} ASC "
+            "OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY"
         )
-        params = (start_id,)
+        params = (start_id, batch_size)
     elif db_type == 'sqlite':
         query = (
-            f"SELECT {id_column} AS remote_id, {text_column} AS text_value "
-            f"FROM {table} WHERE {id_column} > ? ORDER BY {id_column} ASC LIMIT {batch_size}"
+            f"SELECT {id_column} AS remote_id, COALESCE({text_column}, '') AS text_value "
+            f"FROM {table} WHERE {id_column} > ? ORDER BY {id_column} ASC LIMIT ?"
         )
-        params = (start_id,)
+        params = (start_id, batch_size)
     else:
         query = (
-            f"SELECT {id_column} AS remote_id, {text_column} AS text_value "
-            f"FROM {table} WHERE {id_column} > %s ORDER BY {id_column} ASC LIMIT {batch_size}"
+            f"SELECT {id_column} AS remote_id, COALESCE({text_column}, '') AS text_value "
+            f"FROM {table} WHERE {id_column} > %s ORDER BY {id_column} ASC LIMIT %s"
         )
-        params = (start_id,)
+        params = (start_id, batch_size)
     return query, params
 
 
+def build_fetch_all_query(
+    db_type: str,
+    table: str,
+    id_column: str,
+    text_column: str,
+    start_id: int,
+) -> Tuple[str, Tuple[int, ...]]:
+    """Buduje pełnozakresowe zapytanie strumieniowe od wskazanego ID.
+
+    Args:
+        db_type (str): Typ bazy danych źródła.
+        table (str): Nazwa tabeli źródłowej.
+        id_column (str): Nazwa kolumny z kluczem głównym.
+        text_column (str): Nazwa kolumny tekstowej do pobrania.
+        start_id (int): Wartość ID, od której rozpoczynamy pobieranie.
+
+    Returns:
+        tuple[str, tuple[int, ...]]: Zapytanie SQL wraz z krotką parametrów.
+    """
+
+    table = sanitize_identifier(table)
+    id_column = sanitize_identifier(id_column)
+    text_column = sanitize_identifier(text_column)
+
+    placeholder = '?' if db_type in {'mssql', 'sqlite'} else '%s'
+    # COALESCE spycha obsługę NULL-i na serwer — Python nie mapuje None per wiersz
+    query = (
+        f"SELECT {id_column} AS remote_id, COALESCE({text_column}, '') AS text_value "
+        f"FROM {table} WHERE {id_column} > {placeholder} ORDER BY {id_column} ASC"
+    )
+    return query, (start_id,)
+
+
 def resynch_remote_batch(
     conn_local,
     conn_remote,
@@ -619,6 +863,7 @@ def resynch_remote_batch(
     batch_size: int,
     remote_params: Dict[str, Any],
     logger,
+    commit_every: int = 8,
 ) -> None:
     """Porównuje dane zdalne z lokalnymi i aktualizuje zmienione rekordy.
 
@@ -629,6 +874,7 @@ def resynch_remote_batch(
         batch_size (int): Maksymalna liczba rekordów pobieranych w jednej partii.
         remote_params (dict[str, Any]): Parametry połączenia z bazą zewnętrzną.
         logger: Logger do zapisywania komunikatów diagnostycznych.
+        commit_every (int): Liczba partii zatwierdzanych jednym COMMIT (amortyzacja fsync).
     """
 
     id_task = task['id_task']
@@ -637,11 +883,31 @@ def resynch_remote_batch(
     id_column = sanitize_identifier(task['id_column_name'])
     text_column = sanitize_identifier(task['column_name'])
     hash_method = (task.get('hash_method') or 'sha256').lower()
+    # Konstruktor hasha rozwiązujemy raz zamiast dispatchu hashlib.new per wiersz
+    hasher_ctor = make_hasher(hash_method)
+
+    # Autocommit wyłączony raz na sesję — transakcję grupy otwiera niejawnie
+    # pierwsze zapytanie, bez osobnej rundy START TRANSACTION per partia
+    conn_local.autocommit = False
 
+    # Kursor zwykły: pętla przeplata kilka różnych zapytań, a kursor prepared
+    # trzyma tylko jedno przygotowane zapytanie i każdą zmianę tekstu okupuje
+    # ponownym PREPARE — mieszanie zapytań kosztowałoby więcej niż zwykły protokół
     cursor_local = conn_local.cursor()
     cursor_remote = conn_remote.cursor()
+    # Kursor strumienia pełnozakresowego — dla PostgreSQL podmieniany na nazwany
+    stream_cursor = cursor_remote
+
+    # Tabela tymczasowa na identyfikatory partii — stały tekst SQL zamiast rosnącego IN(...)
+    cursor_local.execute(
+        "CREATE TEMPORARY TABLE IF NOT EXISTS _resync_ids (remote_id BIGINT PRIMARY KEY)"
+    )
 
     updated_total = 0
+    # Licznik partii w otwartej grupie transakcyjnej (patrz ``commit_every``)
+    uncommitted_batches = 0
+    # Bufor komunikatów — opis zadania dopisujemy raz zamiast przepisywać go per partia
+    description_buffer: List[str] = []
     # W resynchronizacji korzystamy z istniejącego markera wyliczonego przy pobieraniu
     marker_max_id = int(task.get('marker_max_id') or 0)
     # Postęp w ramach paczek przechowujemy w kolumnie ``marker_id``
@@ -650,52 +916,171 @@ def resynch_remote_batch(
         # Jeżeli poprzedni proces ukończył zakres to rozpoczynamy od zera
         current_marker = 0
 
+    # Prefiltr skrótów wymaga, aby strona zdalna umiała policzyć skrót w SQL (MySQL)
+    use_hash_prefilter = db_type == 'mysql'
+    # Przy sha256 zdalne SHA2 porównujemy wprost z zapisanym original_hash —
+    # lokalna baza nie liczy wtedy żadnych skrótów. SHA2 hashuje bajty w charsecie
+    # kolumny zdalnej, więc przy kolumnach nie-UTF-8 prefiltr bywa fałszywie
+    # dodatni — rozstrzyga porównanie tekstów w etapie 2, jak na ścieżce CRC
+    use_sha_prefilter = use_hash_prefilter and hash_method == 'sha256'
+    # Strumień pełnozakresowy uruchamiamy raz; ścieżka prefiltra przeplata zapytania zdalne
+    stream_started = False
+
+    # Teksty SQL prefiltra są stałe dla zadania — budujemy je raz przed pętlą.
+    # COALESCE zapewnia, że NULL hashuje się jak pusty tekst — inaczej SHA2/CRC32
+    # zwracają NULL i wiersz wychodziłby jako zmieniony co cykl
+    hash_expression = (
+        f"SHA2(COALESCE({text_column}, ''), 256)"
+        if use_sha_prefilter
+        else f"CRC32(COALESCE({text_column}, ''))"
+    )
+    prefilter_query = (
+        f"SELECT {id_column} AS remote_id, {hash_expression} AS text_hash "
+        f"FROM {table} WHERE {id_column} > %s "
+        f"ORDER BY {id_column} ASC LIMIT %s"
+    )
+    local_hash_query = (
+        (
+            # Dla sha256 zapisany original_hash jest gotowym odpowiednikiem SHA2
+            "SELECT ti.remote_id, ti.original_hash FROM task_item ti "
+            if use_sha_prefilter
+            else "SELECT ti.remote_id, CRC32(ti.text_original) FROM task_item ti "
+        )
+        + "JOIN _resync_ids r ON r.remote_id = ti.remote_id "
+        "WHERE ti.id_task = %s"
+    )
+
     try:
         while current_marker < marker_max_id:
-            fetch_query, fetch_params = build_fetch_query(
-                db_type,
-                table,
-                id_column,
-                text_column,
-                batch_size,
-                current_marker,
-            )
-            cursor_remote.execute(fetch_query, fetch_params)
-            rows = cursor_remote.fetchall()
-            row_dicts = rows_to_dicts(cursor_remote, rows)
+            if use_hash_prefilter:
+                # Etap 1: przez sieć idą tylko identyfikatory i skróty zamiast pełnych tekstów
+                cursor_remote.execute(prefilter_query, (current_marker, batch_size))
+                rows = cursor_remote.fetchall()
+                idx_remote, idx_hash = column_indices(cursor_remote, ('remote_id', 'text_hash'))
+
+                valid_rows = [row for row in rows if row[idx_remote] is not None]
+                if not valid_rows:
+                    if not rows:
+                        break
+                    current_marker += batch_size
+                    continue
 
-            valid_rows = [row for row in row_dicts if row.get('remote_id') is not None]
-            if not valid_rows:
-                if not row_dicts:
+                remote_ids = [int(row[idx_remote]) for row in valid_rows]
+                remote_hash_map: Dict[int, Any] = {}
+                for remote_id, row in zip(remote_ids, valid_rows):
+                    hash_value = row[idx_hash]
+                    # Sterownik może zwrócić SHA2 jako bytes — normalizacja do str
+                    if isinstance(hash_value, (bytes, bytearray)):
+                        hash_value = hash_value.decode('ascii')
+                    remote_hash_map[remote_id] = hash_value
+
+                load_resync_ids(cursor_local, remote_ids)
+                cursor_local.execute(local_hash_query, (id_task,))
+                local_hash_map = {int(row[0]): row[1] for row in cursor_local.fetchall()}
+
+                # Etap 2: pełne teksty dociągamy wyłącznie dla rekordów o różnym skrócie
+                changed_ids = [
+                    remote_id
+                    for remote_id in remote_ids
+                    if remote_id not in local_hash_map
+                    or remote_hash_map[remote_id] != local_hash_map[remote_id]
+                ]
+
+                updates: List[Tuple[Any, ...]] = []
+                if changed_ids:
+                    changed_placeholders = ','.join(['%s'] * len(changed_ids))
+                    text_query = (
+                        f"SELECT {id_column} AS remote_id, {text_column} AS text_value "
+                        f"FROM {table} WHERE {id_column} IN ({changed_placeholders})"
+                    )
+                    cursor_remote.execute(text_query, tuple(changed_ids))
+                    text_rows = cursor_remote.fetchall()
+                    idx_changed_remote, idx_changed_text = column_indices(
+                        cursor_remote, ('remote_id', 'text_value')
+                    )
+
+                    cursor_local.execute(
+                        (
+                            "SELECT remote_id, text_original FROM task_item "
+                            f"WHERE id_task = %s AND remote_id IN ({changed_placeholders})"
+                        ),
+                        (id_task,) + tuple(changed_ids),
+                    )
+                    local_map = {int(row[0]): row[1] for row in cursor_local.fetchall()}
+
+                    # Prefiltr bywa fałszywie dodatni (kolizje CRC, SHA2 liczone
+                    # w charsecie kolumny zdalnej zamiast UTF-8), więc o zmianie
+                    # decyduje dokładne porównanie tekstów, a zapisywany skrót
+                    # liczymy zawsze z tekstu zdekodowanego przez sterownik —
+                    # original_hash musi odpowiadać calculate_hash(text_original)
+                    for row in text_rows:
+                        remote_id = int(row[idx_changed_remote])
+                        text_value = row[idx_changed_text]
+                        remote_text = text_value if text_value is not None else ''
+                        local_text = local_map.get(remote_id)
+                        local_text = local_text if local_text is not None else ''
+                        if remote_text != local_text:
+                            original_hash = hasher_ctor(remote_text.encode('utf-8')).hexdigest()
+                            updates.append((remote_text, original_hash, id_task, remote_id))
+            else:
+                if not stream_started:
+                    # Jedno zapytanie pełnozakresowe zamiast ponownego LIMIT-skanu per partia
+                    stream_query, stream_params = build_fetch_all_query(
+                        db_type,
+                        table,
+                        id_column,
+                        text_column,
+                        current_marker,
+                    )
+                    if db_type == 'pgsql':
+                        # Kursor nazwany psycopg2 trzyma wynik po stronie serwera;
+                        # domyślny kursor materializuje cały zakres w pamięci
+                        # klienta już przy execute(), a fetchmany tylko go kroi
+                        stream_cursor = conn_remote.cursor(name='_resync_stream')
+                    stream_cursor.execute(stream_query, stream_params)
+                    # Indeksy kolumn wyznaczamy raz dla całego strumienia
+                    idx_remote, idx_text = column_indices(
+                        stream_cursor, ('remote_id', 'text_value')
+                    )
+                    stream_started = True
+
+                rows = stream_cursor.fetchmany(batch_size)
+                if not rows:
                     break
-                current_marker += batch_size
-                continue
-
-            remote_ids = [int(row['remote_id']) for row in valid_rows]
-            placeholders = ','.join(['%s'] * len(remote_ids))
-            select_sql = (
-                f"SELECT remote_id, text_original FROM task_item "
-                f"WHERE id_task = %s AND remote_id IN ({placeholders})"
-            )
-            params_local = (id_task,) + tuple(remote_ids)
-            cursor_local.execute(select_sql, params_local)
-            local_rows = cursor_local.fetchall()
-            local_map = {int(row[0]): row[1] for row in local_rows}
-
-            updates: List[Tuple[Any, ...]] = []
-            for row in valid_rows:
-                remote_id = int(row['remote_id'])
-                text_value = row.get('text_value')
-                remote_text = text_value if text_value is not None else ''
-                local_text = local_map.get(remote_id)
-                local_text = local_text if local_text is not None else ''
-                if remote_text != local_text:
-                    original_hash = calculate_hash(remote_text, hash_method)
+
+                valid_rows = [row for row in rows if row[idx_remote] is not None]
+                if not valid_rows:
+                    continue
+
+                remote_ids = [int(row[idx_remote]) for row in valid_rows]
+                load_resync_ids(cursor_local, remote_ids)
+                cursor_local.execute(
+                    (
+                        "SELECT ti.remote_id, ti.text_original, ti.original_hash "
+                        "FROM task_item ti "
+                        "JOIN _resync_ids r ON r.remote_id = ti.remote_id "
+                        "WHERE ti.id_task = %s"
+                    ),
+                    (id_task,),
+                )
+                local_rows = cursor_local.fetchall()
+                local_map = {int(row[0]): (row[1], row[2]) for row in local_rows}
+
+                updates = []
+                # Identyfikatory zostały już skonwertowane powyżej — nie powtarzamy int() per wiersz
+                for remote_id, row in zip(remote_ids, valid_rows):
+                    text_value = row[idx_text]
+                    remote_text = text_value if text_value is not None else ''
+                    local_text, stored_hash = local_map.get(remote_id) or (None, None)
+                    local_text = local_text if local_text is not None else ''
+                    if remote_text == local_text and stored_hash:
+                        # Rekord bez zmian z ważnym skrótem — pomijamy bez hashowania
+                        continue
+                    original_hash = hasher_ctor(remote_text.encode('utf-8')).hexdigest()
                     updates.append((remote_text, original_hash, id_task, remote_id))
 
-            last_remote_id = int(valid_rows[-1]['remote_id'])
+            last_remote_id = remote_ids[-1]
 
-            conn_local.start_transaction()
             log_message = None
             if updates:
                 update_sql = (
@@ -703,15 +1088,16 @@ def resynch_remote_batch(
                     "WHERE id_task = %s AND remote_id = %s"
                 )
                 cursor_local.executemany(update_sql, updates)
-                update_task_sql = (
-                    "UPDATE task SET records_updated = records_updated + %s, marker_id = %s WHERE id_task = %s"
-                )
-                cursor_local.execute(update_task_sql, (len(updates), last_remote_id, id_task))
                 log_message = (
                     "Resynchronizacja: zaktualizowano {count} rekordów (zakres_remote_id {first}-{last})."
                     .format(count=len(updates), first=remote_ids[0], last=remote_ids[-1])
                 )
-                append_task_description(cursor_local, id_task, log_message)
+                cursor_local.execute(
+                    _RESYNC_TASK_PROGRESS_SQL,
+                    (len(updates), last_remote_id, id_task),
+                )
+                # Komunikat trafia do bufora — opis zadania zapisujemy raz na końcu cyklu
+                description_buffer.append(log_message)
                 updated_total += len(updates)
             else:
                 # Aktualizujemy marker nawet przy braku zmian w partii
@@ -720,18 +1106,28 @@ def resynch_remote_batch(
                     (last_remote_id, id_task),
                 )
 
-            conn_local.commit()
+            # COMMIT co ``commit_every`` partii — jeden fsync amortyzuje całą grupę
+            uncommitted_batches += 1
+            if uncommitted_batches >= commit_every:
+                conn_local.commit()
+                uncommitted_batches = 0
             if log_message:
                 logger.info(log_message)
 
             current_marker = last_remote_id
-            if len(valid_rows) < batch_size:
+            # W strumieniu koniec danych sygnalizuje puste fetchmany, nie rozmiar partii
+            if use_hash_prefilter and len(valid_rows) < batch_size:
                 break
 
+        # Domknięcie niepełnej grupy przed zapisem podsumowania
+        if uncommitted_batches:
+            conn_local.commit()
+
         summary_message = (
             f"Resynchronizacja zakończona. Zaktualizowano {updated_total} rekordów."
         )
-        append_task_description(cursor_local, id_task, summary_message)
+        description_buffer.append(summary_message)
+        flush_task_descriptions(cursor_local, id_task, description_buffer)
         # Aktualizacja statusu zadania po zakończeniu resynchronizacji
         cursor_local.execute(
             "UPDATE task SET sync_stage = 'done', marker_id = %s WHERE id_task = %s",
@@ -741,12 +1137,16 @@ def resynch_remote_batch(
         logger.info(summary_message)
     except Exception as error:  # noqa: BLE001
         conn_local.rollback()
+        # Zachowujemy komunikaty ukończonych partii razem z wpisem o błędzie
+        flush_task_descriptions(cursor_local, id_task, description_buffer)
         append_task_error(cursor_local, id_task, str(error))
         conn_local.commit()
         logger.exception("Błąd podczas resynchronizacji rekordów")
         raise
     finally:
         cursor_local.close()
+        if stream_cursor is not cursor_remote:
+            stream_cursor.close()
         cursor_remote.close()
 
 
@@ -757,6 +1157,7 @@ def fetch_remote_batch(
     batch_size: int,
     remote_params: Dict[str, Any],
     logger,
+    commit_every: int = 8,
 ) -> None:
     """Pobiera partię rekordów z bazy zewnętrznej i zapisuje je lokalnie.
 
@@ -767,6 +1168,7 @@ def fetch_remote_batch(
         batch_size (int): Maksymalna liczba rekordów do pobrania.
         remote_params (dict[str, Any]): Parametry źródłowej bazy danych.
         logger: Logger do zapisywania komunikatów.
+        commit_every (int): Liczba partii zatwierdzanych jednym COMMIT (amortyzacja fsync).
 
     Raises:
         Exception: Przekazuje dalej wyjątki po zapisaniu ich w ``error_log``.
@@ -778,12 +1180,35 @@ def fetch_remote_batch(
     id_column = sanitize_identifier(task['id_column_name'])
     text_column = sanitize_identifier(task['column_name'])
     hash_method = (task.get('hash_method') or 'sha256').lower()
+    # Konstruktor hasha rozwiązujemy raz zamiast dispatchu hashlib.new per wiersz
+    hasher_ctor = make_hasher(hash_method)
 
+    # Autocommit wyłączony raz na sesję — transakcję grupy otwiera niejawnie
+    # pierwsze zapytanie, bez osobnej rundy START TRANSACTION per partia
+    conn_local.autocommit = False
+
+    # Kursor zwykły do zapytań jednorazowych; kursor prepared trzyma tylko jedno
+    # przygotowane zapytanie, więc gorące zapytania partii dostają osobne kursory —
+    # każde jest przygotowywane na serwerze raz i wykonywane samymi parametrami
     cursor_local = conn_local.cursor()
+    insert_cursor = conn_local.cursor(prepared=True)
+    progress_cursor = conn_local.cursor(prepared=True)
     cursor_remote = conn_remote.cursor()
+    # Potok producent-konsument: wątek producenta pobiera partie z sieci, główny
+    # wątek hashuje i zapisuje lokalnie — opóźnienia obu stron się nakładają
+    prefetch_pool = ThreadPoolExecutor(max_workers=1)
+    batch_queue: 'queue.Queue[Any]' = queue.Queue(maxsize=_PREFETCH_QUEUE_DEPTH)
+    stop_event = threading.Event()
 
     total_count = 0
     marker_max_id = 0
+    # Licznik partii w otwartej grupie transakcyjnej (patrz ``commit_every``)
+    uncommitted_batches = 0
+    # Tabele źródłowe często zawierają powtórzone teksty — hash liczymy raz per wartość;
+    # skrót pustego tekstu jest stały, więc zasiewamy go z góry (częsty w rzadkich kolumnach)
+    hash_cache: Dict[bytes, str] = {b'': hasher_ctor(b'').hexdigest()}
+    # Bufor komunikatów — opis zadania dopisujemy raz zamiast przepisywać go per partia
+    description_buffer: List[str] = []
 
     try:
         # Walidacja istnienia kolumny klucza głównego w tabeli zewnętrznej
@@ -806,17 +1231,28 @@ def fetch_remote_batch(
                     "Nie odnaleziono kolumny identyfikatora w tabeli źródłowej."
                 )
 
-        # Wyznaczenie łącznej liczby rekordów do pobrania
-        count_query = f"SELECT COUNT(*) AS total_count FROM {table}"
-        cursor_remote.execute(count_query)
-        count_row = cursor_remote.fetchone()
-        total_count = int(extract_single_value(count_row, 'total_count') or 0)
+        # Liczbę rekordów i maksymalne ID wyznaczamy jednym zapytaniem (jedna runda do źródła)
+        count_expression = 'COUNT_BIG(*)' if db_type == 'mssql' else 'COUNT(*)'
+        stats_query = (
+            f"SELECT {count_expression} AS total_count, MAX({id_column}) AS max_id FROM {table}"
+        )
+        cursor_remote.execute(stats_query)
+        stats_row = cursor_remote.fetchone()
+
+        # Kształt wiersza jest stały dla sterownika — ekstraktor dopasowujemy raz
+        # zamiast przechodzić łańcuch isinstance dla każdej wartości osobno
+        if isinstance(stats_row, dict):
+            def extract_stat(key: str, index: int) -> Any:
+                return stats_row.get(key)
+        elif isinstance(stats_row, (list, tuple)):
+            def extract_stat(key: str, index: int) -> Any:
+                return stats_row[index] if len(stats_row) > index else None
+        else:
+            def extract_stat(key: str, index: int) -> Any:
+                return getattr(stats_row, key, None)
 
-        # Pobranie maksymalnego ID ze źródła
-        max_query = f"SELECT MAX({id_column}) AS max_id FROM {table}"
-        cursor_remote.execute(max_query)
-        max_row = cursor_remote.fetchone()
-        marker_max_id = int(extract_single_value(max_row, 'max_id') or 0)
+        total_count = int(extract_stat('total_count', 0) or 0)
+        marker_max_id = int(extract_stat('max_id', 1) or 0)
 
         update_task_stage_and_markers(cursor_local, id_task, marker_max_id, 'fetch', total_count)
         conn_local.commit()
@@ -831,99 +1267,169 @@ def fetch_remote_batch(
             append_task_description(cursor_local, id_task, msg)
             print(msg)
             conn_local.commit()
-        current_marker = marker_id
-        while not no_new_records and current_marker < marker_max_id:
-            fetch_query, fetch_params = build_fetch_query(
-                db_type,
-                table,
-                id_column,
-                text_column,
-                batch_size,
-                current_marker,
-            )
-            cursor_remote.execute(fetch_query, fetch_params)
 
-            rows = cursor_remote.fetchall()
-            row_dicts = rows_to_dicts(cursor_remote, rows)
-            if not row_dicts:
+        def enqueue(item: Any) -> None:
+            """Odkłada element do kolejki z poszanowaniem sygnału zatrzymania."""
+            while not stop_event.is_set():
+                try:
+                    batch_queue.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce_batches() -> None:
+            """Wątek producenta: pobiera partie zdalne i odkłada je do kolejki.
+
+            Tylko ten wątek dotyka kursora zdalnego; błędy wędrują do konsumenta
+            przez kolejkę, a wartownik ``None`` kończy potok.
+            """
+            try:
+                # Tekst SQL jest stały dla zadania — budujemy i walidujemy go raz,
+                # w pętli zmieniają się wyłącznie wartości parametrów
+                fetch_query, _ = build_fetch_query(
+                    db_type,
+                    table,
+                    id_column,
+                    text_column,
+                    batch_size,
+                    0,
+                )
+                marker_value = marker_id
+                while marker_value < marker_max_id and not stop_event.is_set():
+                    cursor_remote.execute(fetch_query, (marker_value, batch_size))
+                    rows = cursor_remote.fetchall()
+                    if not rows:
+                        enqueue(('empty', marker_value))
+                        return
+                    idx_remote, idx_text = column_indices(
+                        cursor_remote, ('remote_id', 'text_value')
+                    )
+                    enqueue(('rows', rows, idx_remote, idx_text))
+                    if len(rows) < batch_size:
+                        return
+                    marker_value = int(rows[-1][idx_remote])
+            except Exception as produce_error:  # noqa: BLE001
+                enqueue(('error', produce_error))
+            finally:
+                enqueue(None)
+
+        current_marker = marker_id
+        pipeline_running = not no_new_records and current_marker < marker_max_id
+        if pipeline_running:
+            prefetch_pool.submit(produce_batches)
+        while pipeline_running:
+            item = batch_queue.get()
+            if item is None:
+                break
+            if item[0] == 'error':
+                raise item[1]
+            if item[0] == 'empty':
                 msg = f"Brak nowych rekordów do importu (2) — zapytanie nie zwróciło danych " \
-                      f"(current_marker={current_marker}, marker_max_id={marker_max_id})"
+                      f"(current_marker={item[1]}, marker_max_id={marker_max_id})"
                 append_task_description(cursor_local, id_task, msg)
                 print(msg)
+                # COMMIT domyka też ewentualną otwartą grupę partii
                 conn_local.commit()
+                uncommitted_batches = 0
                 break
 
-            values_to_insert: List[Tuple[Any, ...]] = []
-            for row in row_dicts:
-                remote_id = row.get('remote_id')
-                text_value = row.get('text_value')
+            _, rows, idx_remote, idx_text = item
+            last_remote_id = int(rows[-1][idx_remote])
+
+            # Najpierw zbieramy wiersze partii, aby skróty policzyć zbiorczo
+            pending_rows: List[Tuple[Any, bytes]] = []
+            for row in rows:
+                remote_id = row[idx_remote]
+                text_value = row[idx_text]
                 if remote_id is None:
                     continue
                 # Zapewnienie ciągłości markerów nawet dla pustych tekstów
                 text_value = text_value if text_value is not None else ''
-                original_hash = calculate_hash(text_value, hash_method)
-                values_to_insert.append((id_task, remote_id, text_value, original_hash))
+                # Jednokrotne kodowanie: te same bajty trafiają do hasha i do sterownika;
+                # isascii() to ścieżka C, więc teksty ASCII omijają pełny koder UTF-8
+                if text_value.isascii():
+                    text_bytes = text_value.encode('ascii')
+                else:
+                    text_bytes = text_value.encode('utf-8')
+                pending_rows.append((remote_id, text_bytes))
+
+            # Haszujemy tylko bajty spoza cache, bez duplikatów w ramach partii
+            texts_to_hash = list({tb for _, tb in pending_rows if tb not in hash_cache})
+            if len(texts_to_hash) >= _HASH_POOL_MIN_BATCH:
+                # Duża partia: wątki puli liczą skróty równolegle (OpenSSL zwalnia GIL)
+                digests = _HASH_POOL.map(lambda tb: hasher_ctor(tb).hexdigest(), texts_to_hash)
+            else:
+                digests = (hasher_ctor(tb).hexdigest() for tb in texts_to_hash)
+            batch_hashes: Dict[bytes, str] = {}
+            for text_bytes, digest in zip(texts_to_hash, digests):
+                batch_hashes[text_bytes] = digest
+                if len(hash_cache) < _HASH_CACHE_MAX_ENTRIES:
+                    hash_cache[text_bytes] = digest
+
+            values_to_insert: List[Tuple[Any, ...]] = []
+            for remote_id, text_bytes in pending_rows:
+                original_hash = hash_cache.get(text_bytes) or batch_hashes[text_bytes]
+                values_to_insert.append((id_task, remote_id, text_bytes, original_hash))
 
-            last_remote_id = int(row_dicts[-1]['remote_id'])
             inserted_count = len(values_to_insert)
 
-            # Transakcja: insert + aktualizacja task
-            conn_local.start_transaction()
             if values_to_insert:
-                insert_sql = (
-                    "INSERT INTO task_item (id_task, remote_id, text_original, original_hash, status, fetched_at) "
-                    "VALUES (%s, %s, %s, %s, 'pending', NOW()) "
-                    "ON DUPLICATE KEY UPDATE text_original = VALUES(text_original), "
-                    "original_hash = VALUES(original_hash), fetched_at = VALUES(fetched_at)"
+                insert_task_items_bulk(
+                    cursor_local, values_to_insert, full_chunk_cursor=insert_cursor
                 )
-                cursor_local.executemany(insert_sql, values_to_insert)
 
-            records_fetched_increment = inserted_count
-            update_sql = (
-                "UPDATE task SET records_fetched = records_fetched + %s, "
-                "marker_id = %s WHERE id_task = %s"
-            )
-            cursor_local.execute(
-                update_sql,
-                (records_fetched_increment, last_remote_id, id_task),
+            progress_cursor.execute(
+                _FETCH_TASK_PROGRESS_SQL,
+                (inserted_count, last_remote_id, id_task),
             )
 
             log_message = (
                 f"Pobrano {inserted_count}, marker_id→{last_remote_id}, marker_max_id→{marker_max_id}."
             )
-            append_task_description(cursor_local, id_task, log_message)
+            # Komunikat trafia do bufora — opis zadania zapisujemy raz na końcu cyklu
+            description_buffer.append(log_message)
 
-            conn_local.commit()
+            # COMMIT co ``commit_every`` partii — jeden fsync amortyzuje całą grupę
+            uncommitted_batches += 1
+            if uncommitted_batches >= commit_every:
+                conn_local.commit()
+                uncommitted_batches = 0
 
             logger.info(log_message)
             current_marker = last_remote_id
-            if len(row_dicts) < batch_size:
-                break
 
-        # Uaktualnienie liczników po zakończeniu cyklu
+        # Domknięcie niepełnej grupy przed finalnym podsumowaniem
+        if uncommitted_batches:
+            conn_local.commit()
+
+        # Zbiorczy zapis komunikatów partii przed finalnymi licznikami
+        flush_task_descriptions(cursor_local, id_task, description_buffer)
+
+        # Finalne liczniki jednym UPDATE — COUNT wylicza podzapytanie po stronie serwera
         cursor_local.execute(
-            "SELECT COUNT(*) AS fetched_total FROM task_item WHERE id_task = %s",
-            (id_task,),
+            (
+                "UPDATE task t "
+                "JOIN (SELECT COUNT(*) AS fetched_total FROM task_item WHERE id_task = %s) c "
+                "SET t.records_fetched = c.fetched_total, t.records_total = %s, "
+                "t.sync_stage = IF(c.fetched_total = %s, 'done', t.sync_stage) "
+                "WHERE t.id_task = %s"
+            ),
+            (id_task, total_count, total_count, id_task),
         )
-        local_total_row = cursor_local.fetchone()
-        local_total = int(extract_single_value(local_total_row, 'fetched_total') or 0)
-        records_fetched_value = local_total
-
-        update_columns = "records_fetched = %s, records_total = %s"
-        params: List[Any] = [records_fetched_value, total_count]
-        if records_fetched_value == total_count:
-            update_columns += ", sync_stage = 'done'"
-
-        update_final_sql = f"UPDATE task SET {update_columns} WHERE id_task = %s"
-        params.append(id_task)
-        cursor_local.execute(update_final_sql, tuple(params))
         conn_local.commit()
     except Exception as error:  # noqa: BLE001
         conn_local.rollback()
+        # Zachowujemy komunikaty ukończonych partii razem z wpisem o błędzie
+        flush_task_descriptions(cursor_local, id_task, description_buffer)
         append_task_error(cursor_local, id_task, str(error))
         conn_local.commit()
         logger.exception("Błąd podczas pobierania partii rekordów")
         raise
     finally:
+        # Zatrzymujemy producenta i czekamy na niego, zanim zamkniemy kursor zdalny
+        stop_event.set()
+        prefetch_pool.shutdown(wait=True)
         cursor_local.close()
+        insert_cursor.close()
+        progress_cursor.close()
         cursor_remote.close()